@@ -13,6 +13,19 @@ from pathlib import Path
 from collections import defaultdict
 import argparse
 
+# Header line written by music_id above the ranked results
+QUERY_PATTERN = re.compile(r'^[ \t]*Query:(.*)$', re.MULTILINE)
+
+# Suffixes appended to sample names, in the order they appear:
+# -Main-version, timestamp (_t30s), noise (_white_noise), feature extraction method (_spectral)
+SAMPLE_SUFFIX_PATTERN = re.compile(
+    r'(?:-Main-version)?(?:_t\d+s)?(?:_(?:white|pink|brown)_noise)?(?:_(?:spectral|maxfreq))?$',
+    re.IGNORECASE
+)
+
+# Runs of anything other than lowercase letters and digits
+NON_ALNUM_PATTERN = re.compile(r'[^a-z0-9]+')
+
 def extract_song_name(filename):
     """
     Extract the base song name from a filename with improved parsing.
@@ -25,17 +38,8 @@ def extract_song_name(filename):
     if name.startswith('sample_'):
         name = name[7:]  # Remove 'sample_'
     
-    # Remove feature extraction method suffixes FIRST (before other processing)
-    name = re.sub(r'_(spectral|maxfreq)$', '', name, flags=re.IGNORECASE)
-    
-    # Remove noise indicators
-    name = re.sub(r'_(white|pink|brown)_noise$', '', name, flags=re.IGNORECASE)
-    
-    # Remove timestamp indicators like _t30s, _t91s etc.
-    name = re.sub(r'_t\d+s$', '', name, flags=re.IGNORECASE)
-    
-    # Remove -Main-version suffix (common in your dataset)
-    name = re.sub(r'-Main-version$', '', name, flags=re.IGNORECASE)
+    # Remove the method, noise, timestamp and -Main-version suffixes in a single pass
+    name = SAMPLE_SUFFIX_PATTERN.sub('', name, count=1)
     
     # Remove any trailing underscores or hyphens
     name = name.strip('_-')
@@ -52,14 +56,9 @@ def normalize_song_name(name):
     # Convert to lowercase
     name = name.lower()
     
-    # Replace hyphens and underscores with spaces
-    name = re.sub(r'[-_]+', ' ', name)
-    
-    # Replace special characters with spaces
-    name = re.sub(r'[^a-z0-9\s]', ' ', name)
-    
-    # Normalize multiple spaces to single space
-    name = re.sub(r'\s+', ' ', name)
+    # Replace hyphens, underscores, special characters and whitespace
+    # with a single space in one pass
+    name = NON_ALNUM_PATTERN.sub(' ', name)
     
     # Strip whitespace
     name = name.strip()
@@ -103,21 +102,23 @@ def load_results_csv(filepath):
     results = []
     
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
+        content = Path(filepath).read_text(encoding='utf-8')
     except Exception as e:
         print(f"Error reading file {filepath}: {e}")
         return query_name, results
     
+    # The query header is at the top of the file, so a single search finds it
+    query_match = QUERY_PATTERN.search(content)
+    if query_match:
+        query_name = query_match.group(1).strip()
+    
     lines = content.strip().split('\n')
     
-    # Parse header information
+    # Find where the CSV section starts
     csv_section_started = False
     for i, line in enumerate(lines):
         line = line.strip()
-        if line.startswith('Query:'):
-            query_name = line.split(':', 1)[1].strip()
-        elif line.startswith('Rank,') or (line and ',' in line and any(c.isdigit() for c in line.split(',')[0])):
+        if line.startswith('Rank,') or (line and ',' in line and any(c.isdigit() for c in line.split(',')[0])):
             csv_section_started = True
             # Check if this line is already data (not header)
             if not line.startswith('Rank,'):
@@ -198,6 +199,12 @@ def calculate_accuracy_metrics(results_dir, output_file=None):
             # Check if ground truth appears in top-K results
             found_at_rank = None
             
+            # The first candidate is the top match, keep it for the detailed result
+            top_match = results[0]
+            top_match_extracted = extract_song_name(top_match[1])
+            top_match_normalized = normalize_song_name(top_match_extracted)
+            is_top_match_correct = fuzzy_match(ground_truth, top_match_normalized)
+            
             for rank, filename, ncd_score in results[:10]:  # Only check top 10
                 candidate_extracted = extract_song_name(filename)
                 candidate = normalize_song_name(candidate_extracted)
@@ -219,18 +226,13 @@ def calculate_accuracy_metrics(results_dir, output_file=None):
                     top10_correct += 1
             
             # Store detailed result
-            top_match = results[0] if results else (0, "None", float('inf'))
-            top_match_extracted = extract_song_name(top_match[1]) if results else ""
-            top_match_normalized = normalize_song_name(top_match_extracted) if results else ""
-            is_top_match_correct = fuzzy_match(ground_truth, top_match_normalized) if results else False
-            
             detailed_results.append({
                 'query': query_name,
                 'extracted_query_name': extracted_name,
                 'ground_truth': ground_truth,
                 'top_match': top_match_extracted,
                 'top_match_normalized': top_match_normalized,
-                'top_match_ncd': top_match[2] if results else float('inf'),
+                'top_match_ncd': top_match[2],
                 'found_at_rank': found_at_rank,
                 'correct': is_top_match_correct
             })
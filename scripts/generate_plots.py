@@ -6,14 +6,23 @@ Generates multiple types of plots for analyzing accuracy across different config
 import os
 import json
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # Plots are only written to files, skip GUI backend detection
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
 import argparse
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 import warnings
 warnings.filterwarnings('ignore')
 
+# orjson (from requirements.txt) speeds up loading the accuracy metrics files, fall back to json without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Set style
 plt.style.use('default')
 sns.set_palette("husl")
@@ -31,6 +40,9 @@ class ResultsAnalyzer:
         self.noises = ["clean", "brown", "pink", "white"]
         self.compressors = ["gzip", "bzip2", "lzma", "zstd"]
         
+        # Method+format combinations used as heatmap rows
+        self.combinations = [f"{method}_{format_type}" for method in self.methods for format_type in self.formats]
+        
         # Load all data
         self.data = self.load_all_data()
         
@@ -62,8 +74,8 @@ class ResultsAnalyzer:
                             
                             if path.exists():
                                 try:
-                                    with open(path, 'r') as f:
-                                        data[key] = json.load(f)
+                                    with open(path, 'rb') as f:
+                                        data[key] = orjson.loads(f.read()) if orjson else json.load(f)
                                 except Exception as e:
                                     print(f"Error loading {path}: {e}")
                                     missing_combinations.append(key)
@@ -116,21 +128,19 @@ class ResultsAnalyzer:
         fig, axes = plt.subplots(2, 2, figsize=(16, 12))
         axes = axes.flatten()
         
+        # Matrix rows = method+format combinations, cols = compressors (same for every noise)
+        combinations = self.combinations
+        total_possible = len(combinations) * len(self.compressors)
+        
         for idx, noise in enumerate(self.noises):
             if idx >= 4:
                 break
                 
             ax = axes[idx]
             
-            # Create matrix: rows = method+format combinations, cols = compressors
-            combinations = []
-            for method in self.methods:
-                for format_type in self.formats:
-                    combinations.append(f"{method}_{format_type}")
-            
-            matrix = np.zeros((len(combinations), len(self.compressors)))
+            # Cells without data stay NaN and are marked N/A
+            matrix = np.full((len(combinations), len(self.compressors)), np.nan)
             available_data_count = 0
-            total_possible = len(combinations) * len(self.compressors)
             
             for i, combo in enumerate(combinations):
                 method, format_type = combo.split('_')
@@ -139,8 +149,6 @@ class ResultsAnalyzer:
                     if acc is not None:
                         matrix[i, j] = acc
                         available_data_count += 1
-                    else:
-                        matrix[i, j] = np.nan
             
             # Always create the plot if we have any data
             if available_data_count > 0:
@@ -181,9 +189,9 @@ class ResultsAnalyzer:
         dataset_info = f" ({self.dataset} dataset)" if self.dataset != 'both' else " (combined datasets)"
         fig.suptitle(f'Accuracy Heatmaps by Noise Type{dataset_info}', fontsize=14, y=0.98)
         
-        plt.tight_layout()
-        plt.savefig(self.output_dir / f'accuracy_heatmap_{self.dataset}.png', dpi=300, bbox_inches='tight')
-        plt.close()
+        fig.tight_layout()
+        fig.savefig(self.output_dir / f'accuracy_heatmap_{self.dataset}.png', dpi=300, bbox_inches='tight')
+        plt.close(fig)
         print(f"Created accuracy_heatmap_{self.dataset}.png")
 
     def create_compressor_ranking(self):
@@ -261,9 +269,9 @@ class ResultsAnalyzer:
                     ha='center', va='center', transform=ax.transAxes, fontsize=12)
                 ax.set_title(title)
         
-        plt.tight_layout()
-        plt.savefig(self.output_dir / 'compressor_ranking.png', dpi=300, bbox_inches='tight')
-        plt.close()
+        fig.tight_layout()
+        fig.savefig(self.output_dir / 'compressor_ranking.png', dpi=300, bbox_inches='tight')
+        plt.close(fig)
         print("Created compressor_ranking.png")
     
     def create_format_comparison(self):
@@ -353,9 +361,9 @@ class ResultsAnalyzer:
                        ha='center', va='center', transform=ax.transAxes, fontsize=12)
                 ax.set_title(title)
         
-        plt.tight_layout()
-        plt.savefig(self.output_dir / 'format_comparison.png', dpi=300, bbox_inches='tight')
-        plt.close()
+        fig.tight_layout()
+        fig.savefig(self.output_dir / 'format_comparison.png', dpi=300, bbox_inches='tight')
+        plt.close(fig)
         print("Created format_comparison.png")
     
     def create_method_comparison(self):
@@ -445,9 +453,9 @@ class ResultsAnalyzer:
                        ha='center', va='center', transform=ax.transAxes, fontsize=12)
                 ax.set_title(title)
         
-        plt.tight_layout()
-        plt.savefig(self.output_dir / 'method_comparison.png', dpi=300, bbox_inches='tight')
-        plt.close()
+        fig.tight_layout()
+        fig.savefig(self.output_dir / 'method_comparison.png', dpi=300, bbox_inches='tight')
+        plt.close(fig)
         print("Created method_comparison.png")
     
     def create_noise_comparison(self):
@@ -656,12 +664,10 @@ class ResultsAnalyzer:
         ax4 = axes[1, 1]
         
         # Create matrix: rows = method+format combinations, cols = noise types
-        combinations = []
-        for method in self.methods:
-            for format_type in self.formats:
-                combinations.append(f"{method}_{format_type}")
+        combinations = self.combinations
         
-        matrix = np.zeros((len(combinations), len(self.noises)))
+        # Cells without data stay NaN and are marked N/A
+        matrix = np.full((len(combinations), len(self.noises)), np.nan)
         available_data_count = 0
         total_possible = len(combinations) * len(self.noises)
         
@@ -677,8 +683,6 @@ class ResultsAnalyzer:
                 if scores:
                     matrix[i, j] = np.mean(scores)
                     available_data_count += 1
-                else:
-                    matrix[i, j] = np.nan
         
         if available_data_count > 0:
             im = ax4.imshow(matrix, cmap='RdYlGn', aspect='auto', vmin=0, vmax=100)
@@ -708,80 +712,29 @@ class ResultsAnalyzer:
             ax4.text(0.5, 0.5, 'No data available', ha='center', va='center', transform=ax4.transAxes)
             ax4.set_title('Configuration vs Noise')
         
-        plt.tight_layout()
-        plt.savefig(self.output_dir / 'noise_comparison.png', dpi=300, bbox_inches='tight')
-        plt.close()
+        fig.tight_layout()
+        fig.savefig(self.output_dir / 'noise_comparison.png', dpi=300, bbox_inches='tight')
+        plt.close(fig)
         print("Created noise_comparison.png")
 
-    def create_performance_overview(self):
-        """Create 4 plots for performance overview."""
-        fig, axes = plt.subplots(2, 2, figsize=(16, 12))
-        
-        # Plot 1: Distribution of top-1 accuracy scores
-        ax1 = axes[0, 0]
-        all_scores = []
-        
-        for method in self.methods:
-            for format_type in self.formats:
-                for noise in self.noises:
-                    for compressor in self.compressors:
-                        acc = self.get_accuracy(method, format_type, noise, compressor, 'top1_accuracy')
-                        if acc is not None:
-                            all_scores.append(acc)
-        
-        if all_scores:
-            n, bins, patches = ax1.hist(all_scores, bins=20, alpha=0.7, edgecolor='black')
-            
-            # Add frequency labels on top of bars
-            for i in range(len(n)):
-                if n[i] > 0:  # Only show label if there are values in this bin
-                    ax1.text(bins[i] + (bins[i+1] - bins[i])/2, n[i] + 0.1, 
-                            f'{int(n[i])}', ha='center', va='bottom', fontsize=8)
-            
-            ax1.set_xlabel('Top-1 Accuracy (%)')
-            ax1.set_ylabel('Frequency')
-            ax1.grid(True, alpha=0.3)
-            ax1.axvline(np.mean(all_scores), color='red', linestyle='--', 
-                    label=f'Mean: {np.mean(all_scores):.1f}%')
-            ax1.legend()
-            
-            # Add missing data info
-            total_possible = len(self.methods) * len(self.formats) * len(self.noises) * len(self.compressors)
-            missing_msg = self.get_missing_data_message(len(all_scores), total_possible)
-            title = 'Distribution of Top-1 Accuracy Scores'
-            if missing_msg:
-                title += f'\n({missing_msg})'
-            ax1.set_title(title, fontsize=10)
-        else:
-            ax1.text(0.5, 0.5, 'No data available', ha='center', va='center', transform=ax1.transAxes)
-            ax1.set_title('Distribution of Top-1 Accuracy Scores')
-        
-        def generate_all_plots(self):
-            """Generate all requested visualizations."""
-            print(f"Generating visualization plots for {self.dataset} dataset(s)...")
-            
-            self.create_accuracy_heatmap()
-            self.create_compressor_ranking()
-            self.create_format_comparison()
-            self.create_method_comparison()
-            self.create_noise_comparison()
-            self.create_performance_overview()
-            
-            print(f"\nAll plots saved to: {self.output_dir}")
-            print("Generated files:")
-            for png_file in sorted(self.output_dir.glob("*.png")):
-                print(f"  - {png_file.name}")
-
     def generate_all_plots(self):
         """Generate all requested visualizations."""
         print(f"Generating visualization plots for {self.dataset} dataset(s)...")
         
-        self.create_accuracy_heatmap()
-        self.create_compressor_ranking()
-        self.create_format_comparison()
-        self.create_method_comparison()
-        self.create_noise_comparison()
-        self.create_performance_overview()
+        plot_functions = [
+            self.create_accuracy_heatmap,
+            self.create_compressor_ranking,
+            self.create_format_comparison,
+            self.create_method_comparison,
+            self.create_noise_comparison
+        ]
+        
+        # Each plot builds and saves its own figure, so render them in separate processes.
+        # Every submit pickles the whole analyzer, self.data included, which is cheap at this size.
+        with ProcessPoolExecutor() as executor:
+            futures = [executor.submit(plot_function) for plot_function in plot_functions]
+            for future in futures:
+                future.result()
         
         print(f"\nAll plots saved to: {self.output_dir}")
         print("Generated files:")
@@ -6,18 +6,36 @@ Analyzes accuracy performance across different music genres.
 import os
 import json
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # Plots are only written to files, skip GUI backend detection
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 import re
 import warnings
 warnings.filterwarnings('ignore')
 
+# orjson (from requirements.txt) speeds up loading the accuracy metrics files, fall back to json without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Set style
 plt.style.use('default')
 sns.set_palette("Set3")
 
+# Text normalization patterns, compiled once for every song and query
+ANNOTATION_PAREN_PATTERN = re.compile(r'\(.*?(?:lyrics?|video|official|hd|hq|audio|letra).*?\)')
+ANNOTATION_BRACKET_PATTERN = re.compile(r'\[.*?(?:lyrics?|video|official|hd|hq).*?\]')
+SYMBOL_PATTERN = re.compile(r'[🎵🎶🎤🎧｜]')
+NON_ALNUM_PATTERN = re.compile(r'[^a-z0-9]+')
+
+# Timestamp, noise and method suffixes of query filenames, e.g. _t30s_pink_noise_spectral
+QUERY_SUFFIX_PATTERN = re.compile(r'(?:_t\d+s)?(?:_(?:white|pink|brown|clean)_noise)?(?:_(?:spectral|maxfreq))?$')
+
 class GenreAnalyzer:
     def __init__(self, results_dir, output_dir, songs_genre_file):
         self.results_dir = Path(results_dir)
@@ -31,10 +49,18 @@ class GenreAnalyzer:
         self.noises = ["clean", "brown", "pink", "white"]
         self.compressors = ["gzip", "bzip2", "lzma", "zstd"]
         
+        # Genre matched to each query filename, filled on first lookup
+        self.query_genres = {}
+        
         # Load genre mapping and results
         self.genre_mapping = self.load_genre_mapping()
         self.results_data = self.load_results_data()
         
+        # Per-query records shared by every analysis and plot
+        self.genre_records = self.build_genre_records()
+        self.genre_results = None
+        self.genre_stats = None
+        
         print(f"Loaded results for {len(self.results_data)} configurations")
         print(f"Loaded {len(self.genre_mapping)} songs across {len(set(self.genre_mapping.values()))} genres")
         
@@ -47,15 +73,12 @@ class GenreAnalyzer:
         text = text.lower()
         
         # Remove common YouTube annotations
-        text = re.sub(r'\(.*?(?:lyrics?|video|official|hd|hq|audio|letra).*?\)', '', text)
-        text = re.sub(r'\[.*?(?:lyrics?|video|official|hd|hq).*?\]', '', text)
-        text = re.sub(r'[🎵🎶🎤🎧｜]', '', text)
+        text = ANNOTATION_PAREN_PATTERN.sub('', text)
+        text = ANNOTATION_BRACKET_PATTERN.sub('', text)
+        text = SYMBOL_PATTERN.sub('', text)
         
-        # Replace special characters with spaces
-        text = re.sub(r'[^a-z0-9\s]', ' ', text)
-        
-        # Normalize spaces
-        text = re.sub(r'\s+', ' ', text)
+        # Replace special characters and runs of whitespace with a single space
+        text = NON_ALNUM_PATTERN.sub(' ', text)
         
         return text.strip()
     
@@ -101,9 +124,7 @@ class GenreAnalyzer:
         if name.startswith('sample_'):
             name = name[7:]
         
-        name = re.sub(r'_(spectral|maxfreq)$', '', name)
-        name = re.sub(r'_(white|pink|brown|clean)_noise$', '', name)
-        name = re.sub(r'_t\d+s$', '', name)
+        name = QUERY_SUFFIX_PATTERN.sub('', name, count=1)
         name = name.strip('_-')
         
         return self.normalize_text(name)
@@ -127,6 +148,10 @@ class GenreAnalyzer:
     
     def match_song_to_genre(self, query_filename):
         """Match a query filename to its genre using word similarity"""
+        # The same queries appear in every configuration, so only match each one once
+        if query_filename in self.query_genres:
+            return self.query_genres[query_filename]
+        
         query_text = self.extract_query_text(query_filename)
         
         best_match = None
@@ -140,7 +165,9 @@ class GenreAnalyzer:
                 best_similarity = similarity
                 best_match = genre
         
-        return best_match if best_match else "Unknown"
+        genre = best_match if best_match else "Unknown"
+        self.query_genres[query_filename] = genre
+        return genre
     
     def load_results_data(self):
         """Load all accuracy results from the results directory."""
@@ -156,29 +183,37 @@ class GenreAnalyzer:
                         
                         if metrics_file.exists():
                             try:
-                                with open(metrics_file, 'r') as f:
-                                    data = json.load(f)
+                                with open(metrics_file, 'rb') as f:
+                                    data = orjson.loads(f.read()) if orjson else json.load(f)
                                 results[(method, format_type, noise, compressor)] = data
                             except Exception as e:
                                 print(f"Error loading {metrics_file}: {e}")
         
         return results
     
-    def analyze_genre_accuracy(self):
-        """Analyze accuracy by genre across all configurations."""
-        genre_results = defaultdict(lambda: defaultdict(list))
-        unmatched_queries = []
+    def build_genre_records(self):
+        """Pair each configuration with the (genre, result) records of its detailed results."""
+        records = []
         
         for config, data in self.results_data.items():
             if 'detailed_results' not in data:
                 continue
                 
-            for result in data['detailed_results']:
-                query = result['query']
-                genre = self.match_song_to_genre(query)
-                
+            config_records = [(self.match_song_to_genre(result['query']), result)
+                              for result in data['detailed_results']]
+            records.append((config, config_records))
+        
+        return records
+    
+    def analyze_genre_accuracy(self):
+        """Analyze accuracy by genre across all configurations."""
+        genre_results = defaultdict(lambda: defaultdict(list))
+        unmatched_queries = []
+        
+        for config, config_records in self.genre_records:
+            for genre, result in config_records:
                 if genre == "Unknown":
-                    unmatched_queries.append(query)
+                    unmatched_queries.append(result['query'])
                 
                 top1_correct = result.get('correct', False)
                 top5_correct = result.get('found_at_rank') is not None and result.get('found_at_rank', 11) <= 5
@@ -223,32 +258,43 @@ class GenreAnalyzer:
             if len(unique_unmatched) > 15:
                 print(f"... and {len(unique_unmatched) - 15} more unmatched queries")
         
-        return genre_results
+        # Plain dicts, so the results can be sent along with the analyzer to worker processes
+        return {genre: dict(results) for genre, results in genre_results.items()}
+    
+    def get_genre_results(self):
+        """Return the genre accuracy analysis, running it on first use."""
+        if self.genre_results is None:
+            self.genre_results = self.analyze_genre_accuracy()
+        return self.genre_results
+    
+    def get_genre_stats(self):
+        """Return (genre, top-1 %, top-5 %, samples) for every known genre, computed on first use."""
+        if self.genre_stats is None:
+            self.genre_stats = []
+            for genre, results in self.get_genre_results().items():
+                if genre != "Unknown" and results['top1_correct']:
+                    top1 = np.mean(results['top1_correct']) * 100
+                    top5 = np.mean(results['top5_correct']) * 100
+                    samples = len(results['top1_correct'])
+                    self.genre_stats.append((genre, top1, top5, samples))
+        return self.genre_stats
     
     def create_genre_plots(self):
         """Create main genre analysis plots"""
-        genre_results = self.analyze_genre_accuracy()
+        genre_results = self.get_genre_results()
         
         if not genre_results:
             print("No genre results found")
             return
             
         # Prepare data (excluding Unknown)
-        genres = []
-        top1_accs = []
-        top5_accs = []
-        sample_counts = []
-        
-        for genre, results in genre_results.items():
-            if genre != "Unknown" and results['top1_correct']:
-                genres.append(genre)
-                top1_accs.append(np.mean(results['top1_correct']) * 100)
-                top5_accs.append(np.mean(results['top5_correct']) * 100)
-                sample_counts.append(len(results['top1_correct']))
+        genre_stats = self.get_genre_stats()
         
-        if not genres:
+        if not genre_stats:
             print("No genre data to plot")
             return
+        
+        genres, top1_accs, top5_accs, sample_counts = map(list, zip(*genre_stats))
             
         # Create plots
         fig, axes = plt.subplots(2, 2, figsize=(20, 16))
@@ -306,9 +352,9 @@ class GenreAnalyzer:
             ax4.pie(sizes, labels=labels, autopct='%1.1f%%', colors=colors, startangle=90)
             ax4.set_title(f'Matching Success\n(Total: {known_count + unknown_count})')
         
-        plt.tight_layout()
-        plt.savefig(self.output_dir / 'genre_analysis.png', dpi=300, bbox_inches='tight')
-        plt.close()
+        fig.tight_layout()
+        fig.savefig(self.output_dir / 'genre_analysis.png', dpi=300, bbox_inches='tight')
+        plt.close(fig)
         print("Created genre_analysis.png")
 
     def create_method_format_plots(self):
@@ -327,9 +373,9 @@ class GenreAnalyzer:
         # Plot 4: Configuration Ranking (Top 15)
         self._plot_configuration_ranking(axes[1, 1])
         
-        plt.tight_layout()
-        plt.savefig(self.output_dir / 'method_format_analysis.png', dpi=300, bbox_inches='tight')
-        plt.close()
+        fig.tight_layout()
+        fig.savefig(self.output_dir / 'method_format_analysis.png', dpi=300, bbox_inches='tight')
+        plt.close(fig)
         print("Created method_format_analysis.png")
 
     def create_noise_compressor_plots(self):
@@ -348,9 +394,9 @@ class GenreAnalyzer:
         # Plot 4: Error Analysis
         self._plot_error_analysis(axes[1, 1])
         
-        plt.tight_layout()
-        plt.savefig(self.output_dir / 'noise_compressor_analysis.png', dpi=300, bbox_inches='tight')
-        plt.close()
+        fig.tight_layout()
+        fig.savefig(self.output_dir / 'noise_compressor_analysis.png', dpi=300, bbox_inches='tight')
+        plt.close(fig)
         print("Created noise_compressor_analysis.png")
 
     def create_difficulty_analysis_plots(self):
@@ -363,22 +409,19 @@ class GenreAnalyzer:
         # Plot 2: Top-5 vs Top-1 Comparison
         self._plot_top5_vs_top1_comparison(axes[1])
         
-        plt.tight_layout()
-        plt.savefig(self.output_dir / 'difficulty_analysis.png', dpi=300, bbox_inches='tight')
-        plt.close()
+        fig.tight_layout()
+        fig.savefig(self.output_dir / 'difficulty_analysis.png', dpi=300, bbox_inches='tight')
+        plt.close(fig)
         print("Created difficulty_analysis.png")
 
     def _plot_method_by_genre(self, ax):
         """Plot method effectiveness by genre"""
         method_genre_data = defaultdict(lambda: defaultdict(list))
         
-        for config, data in self.results_data.items():
-            if 'detailed_results' not in data:
-                continue
+        for config, config_records in self.genre_records:
             method, format_type, noise, compressor = config
             
-            for result in data['detailed_results']:
-                genre = self.match_song_to_genre(result['query'])
+            for genre, result in config_records:
                 if genre != "Unknown":
                     accuracy = 1 if result.get('correct', False) else 0
                     method_genre_data[method][genre].append(accuracy)
@@ -387,6 +430,11 @@ class GenreAnalyzer:
         all_genres = sorted(set().union(*[method_data.keys() for method_data in method_genre_data.values()]))
         methods = ['maxfreq', 'spectral']
         
+        if not all_genres:
+            ax.text(0.5, 0.5, 'No genre data available', ha='center', va='center', transform=ax.transAxes)
+            ax.set_title('Method Performance by Genre')
+            return
+        
         x = np.arange(len(all_genres))
         width = 0.35
         
@@ -413,13 +461,10 @@ class GenreAnalyzer:
         """Plot format effectiveness by genre"""
         format_genre_data = defaultdict(lambda: defaultdict(list))
         
-        for config, data in self.results_data.items():
-            if 'detailed_results' not in data:
-                continue
+        for config, config_records in self.genre_records:
             method, format_type, noise, compressor = config
             
-            for result in data['detailed_results']:
-                genre = self.match_song_to_genre(result['query'])
+            for genre, result in config_records:
                 if genre != "Unknown":
                     accuracy = 1 if result.get('correct', False) else 0
                     format_genre_data[format_type][genre].append(accuracy)
@@ -427,6 +472,11 @@ class GenreAnalyzer:
         # Get all genres
         all_genres = sorted(set().union(*[format_data.keys() for format_data in format_genre_data.values()]))
         
+        if not all_genres:
+            ax.text(0.5, 0.5, 'No genre data available', ha='center', va='center', transform=ax.transAxes)
+            ax.set_title('Format Performance by Genre')
+            return
+        
         x = np.arange(len(all_genres))
         width = 0.35
         formats = ['text', 'binary']
@@ -454,13 +504,10 @@ class GenreAnalyzer:
         """Plot noise impact by genre"""
         noise_genre_data = defaultdict(lambda: defaultdict(list))
         
-        for config, data in self.results_data.items():
-            if 'detailed_results' not in data:
-                continue
+        for config, config_records in self.genre_records:
             method, format_type, noise, compressor = config
             
-            for result in data['detailed_results']:
-                genre = self.match_song_to_genre(result['query'])
+            for genre, result in config_records:
                 if genre != "Unknown":
                     accuracy = 1 if result.get('correct', False) else 0
                     noise_genre_data[noise][genre].append(accuracy)
@@ -468,6 +515,11 @@ class GenreAnalyzer:
         # Get all genres
         all_genres = sorted(set().union(*[noise_data.keys() for noise_data in noise_genre_data.values()]))
         
+        if not all_genres:
+            ax.text(0.5, 0.5, 'No genre data available', ha='center', va='center', transform=ax.transAxes)
+            ax.set_title('Noise Impact by Genre')
+            return
+        
         x = np.arange(len(all_genres))
         width = 0.2
         noises = ['clean', 'brown', 'pink', 'white']
@@ -496,13 +548,10 @@ class GenreAnalyzer:
         """Plot compressor effectiveness by genre"""
         comp_genre_data = defaultdict(lambda: defaultdict(list))
         
-        for config, data in self.results_data.items():
-            if 'detailed_results' not in data:
-                continue
+        for config, config_records in self.genre_records:
             method, format_type, noise, compressor = config
             
-            for result in data['detailed_results']:
-                genre = self.match_song_to_genre(result['query'])
+            for genre, result in config_records:
                 if genre != "Unknown":
                     accuracy = 1 if result.get('correct', False) else 0
                     comp_genre_data[compressor][genre].append(accuracy)
@@ -510,6 +559,11 @@ class GenreAnalyzer:
         # Get all genres
         all_genres = sorted(set().union(*[comp_data.keys() for comp_data in comp_genre_data.values()]))
         
+        if not all_genres:
+            ax.text(0.5, 0.5, 'No genre data available', ha='center', va='center', transform=ax.transAxes)
+            ax.set_title('Compressor Performance by Genre')
+            return
+        
         x = np.arange(len(all_genres))
         width = 0.2
         compressors = ['gzip', 'bzip2', 'lzma', 'zstd']
@@ -538,14 +592,11 @@ class GenreAnalyzer:
         """Create accuracy heatmap across configurations"""
         config_genre_accuracy = defaultdict(lambda: defaultdict(list))
         
-        for config, data in self.results_data.items():
-            if 'detailed_results' not in data:
-                continue
+        for config, config_records in self.genre_records:
             method, format_type, noise, compressor = config
             config_name = f"{method}_{format_type}"
             
-            for result in data['detailed_results']:
-                genre = self.match_song_to_genre(result['query'])
+            for genre, result in config_records:
                 if genre != "Unknown":
                     accuracy = 1 if result.get('correct', False) else 0
                     config_genre_accuracy[config_name][genre].append(accuracy)
@@ -554,6 +605,11 @@ class GenreAnalyzer:
         genres = sorted(list(set().union(*[config_data.keys() for config_data in config_genre_accuracy.values()])))
         configs = sorted(config_genre_accuracy.keys())
         
+        if not genres:
+            ax.text(0.5, 0.5, 'No genre data available', ha='center', va='center', transform=ax.transAxes)
+            ax.set_title('Accuracy Heatmap by Configuration')
+            return
+        
         heatmap_data = []
         for config in configs:
             row = []
@@ -587,7 +643,7 @@ class GenreAnalyzer:
         genre_accuracies = []
         genre_names = []
         
-        for genre, results in self.analyze_genre_accuracy().items():
+        for genre, results in self.get_genre_results().items():
             if genre != "Unknown" and results['top1_correct']:
                 accuracies = [acc * 100 for acc in results['top1_correct']]
                 genre_accuracies.extend(accuracies)
@@ -617,14 +673,11 @@ class GenreAnalyzer:
         """Plot ranking of best configurations"""
         config_performance = defaultdict(list)
         
-        for config, data in self.results_data.items():
-            if 'detailed_results' not in data:
-                continue
+        for config, config_records in self.genre_records:
             method, format_type, noise, compressor = config
             config_name = f"{method}_{format_type}_{noise}_{compressor}"
             
-            for result in data['detailed_results']:
-                genre = self.match_song_to_genre(result['query'])
+            for genre, result in config_records:
                 if genre != "Unknown":
                     accuracy = 1 if result.get('correct', False) else 0
                     config_performance[config_name].append(accuracy)
@@ -633,6 +686,11 @@ class GenreAnalyzer:
         config_avg = [(config, np.mean(accuracies) * 100) for config, accuracies in config_performance.items() if accuracies]
         config_avg.sort(key=lambda x: x[1], reverse=True)
         
+        if not config_avg:
+            ax.text(0.5, 0.5, 'No configuration data available', ha='center', va='center', transform=ax.transAxes)
+            ax.set_title('Top 15 Configuration Rankings')
+            return
+        
         # Show top 15 configurations
         top_configs = config_avg[:15]
         configs, accuracies = zip(*top_configs)
@@ -651,12 +709,8 @@ class GenreAnalyzer:
         """Analyze common error patterns"""
         top_rank_counts = defaultdict(int)
         
-        for config, data in self.results_data.items():
-            if 'detailed_results' not in data:
-                continue
-                
-            for result in data['detailed_results']:
-                genre = self.match_song_to_genre(result['query'])
+        for config, config_records in self.genre_records:
+            for genre, result in config_records:
                 if genre != "Unknown":
                     rank = result.get('found_at_rank', 11)
                     if rank and rank <= 10:
@@ -678,16 +732,8 @@ class GenreAnalyzer:
 
     def _plot_genre_difficulty(self, ax):
         """Plot genre difficulty analysis"""
-        genre_results = self.analyze_genre_accuracy()
-        
-        # Calculate metrics for each genre
-        genre_metrics = []
-        for genre, results in genre_results.items():
-            if genre != "Unknown" and results['top1_correct']:
-                top1 = np.mean(results['top1_correct']) * 100
-                top5 = np.mean(results['top5_correct']) * 100
-                samples = len(results['top1_correct'])
-                genre_metrics.append((genre, top1, top5, samples))
+        # Metrics for each genre, copied so sorting leaves the shared list intact
+        genre_metrics = list(self.get_genre_stats())
         
         if not genre_metrics:
             ax.text(0.5, 0.5, 'No genre data available', ha='center', va='center', transform=ax.transAxes)
@@ -734,23 +780,15 @@ class GenreAnalyzer:
 
     def _plot_top5_vs_top1_comparison(self, ax):
         """Plot Top-5 vs Top-1 accuracy comparison"""
-        genre_results = self.analyze_genre_accuracy()
-        
-        genres = []
-        top1_accs = []
-        top5_accs = []
+        genre_stats = self.get_genre_stats()
         
-        for genre, results in genre_results.items():
-            if genre != "Unknown" and results['top1_correct']:
-                genres.append(genre)
-                top1_accs.append(np.mean(results['top1_correct']) * 100)
-                top5_accs.append(np.mean(results['top5_correct']) * 100)
-        
-        if not genres:
+        if not genre_stats:
             ax.text(0.5, 0.5, 'No genre data available', ha='center', va='center', transform=ax.transAxes)
             ax.set_title('Top-5 vs Top-1 Comparison')
             return
         
+        genres, top1_accs, top5_accs, _ = zip(*genre_stats)
+        
         # Create scatter plot
         ax.scatter(top1_accs, top5_accs, s=100, alpha=0.7, c=range(len(genres)), cmap='tab10')
         
@@ -772,8 +810,6 @@ class GenreAnalyzer:
 
     def create_report(self):
         """Create a summary report"""
-        genre_results = self.analyze_genre_accuracy()
-        
         report_file = self.output_dir / 'genre_report.txt'
         
         with open(report_file, 'w') as f:
@@ -781,15 +817,7 @@ class GenreAnalyzer:
             f.write("=" * 30 + "\n\n")
             
             # Summary statistics
-            genre_stats = []
-            for genre, results in genre_results.items():
-                if genre != "Unknown" and results['top1_correct']:
-                    top1_acc = np.mean(results['top1_correct']) * 100
-                    top5_acc = np.mean(results['top5_correct']) * 100
-                    sample_count = len(results['top1_correct'])
-                    genre_stats.append((genre, top1_acc, top5_acc, sample_count))
-            
-            genre_stats.sort(key=lambda x: x[1], reverse=True)
+            genre_stats = sorted(self.get_genre_stats(), key=lambda x: x[1], reverse=True)
             
             f.write(f"{'Genre':<25} {'Top-1%':<8} {'Top-5%':<8} {'Samples':<8}\n")
             f.write("-" * 55 + "\n")
@@ -817,11 +845,23 @@ class GenreAnalyzer:
             print("No results data available")
             return
         
-        self.create_genre_plots()
-        self.create_method_format_plots()
-        self.create_noise_compressor_plots()
-        self.create_difficulty_analysis_plots()
-        self.create_report()
+        # Analyze once here so the workers below share the results instead of each recomputing them
+        self.get_genre_stats()
+        
+        output_functions = [
+            self.create_genre_plots,
+            self.create_method_format_plots,
+            self.create_noise_compressor_plots,
+            self.create_difficulty_analysis_plots,
+            self.create_report
+        ]
+        
+        # Each output is built and saved independently, so render them in separate processes.
+        # Every submit pickles the whole analyzer, results_data and genre_records included.
+        with ProcessPoolExecutor() as executor:
+            futures = [executor.submit(output_function) for output_function in output_functions]
+            for future in futures:
+                future.result()
         
         print(f"\nAnalysis complete. Files saved to: {self.output_dir}")
         print("Generated files:")